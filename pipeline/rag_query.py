@@ -1,27 +1,317 @@
-from typing import List
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from itertools import starmap
+from typing import Dict, Iterator, List, Optional, Tuple
+import asyncio
+import atexit
+import hashlib
+import json
 import logging
+import operator
+import os
+import threading
+import time
 import vertexai
 from vertexai import rag
-from google.api_core import retry
+from google.api_core import exceptions, retry, retry_async
+
+# Optional dependencies for the semantic query cache
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+try:
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+except ImportError:  # pragma: no cover - sentence-transformers is optional
+    CrossEncoder = None
+    SentenceTransformer = None
+
+try:
+    import faiss
+except ImportError:  # pragma: no cover - faiss is optional
+    faiss = None
+
+# Optional dependency for the lexical stage of hybrid retrieval
+try:
+    from rank_bm25 import BM25Okapi
+except ImportError:  # pragma: no cover - rank-bm25 is optional
+    BM25Okapi = None
+
+# Optional dependencies for the persistent disk cache
+try:
+    import diskcache
+except ImportError:  # pragma: no cover - diskcache is optional
+    diskcache = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Optional dependency for the msgpack result encoding
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
 
 logger = logging.getLogger("vertex-rag-query")
 logging.basicConfig(level=logging.INFO)
+# Per-query details are logged at DEBUG; set RAG_VERBOSE=1 to see them
+if os.environ.get("RAG_VERBOSE") == "1":
+    logger.setLevel(logging.DEBUG)
 
 # ============================================================
 # CONFIG
 # ============================================================
 PROJECT_ID = "your-gcp-project-id"
 LOCATION = "us-central1"
+DEFAULT_TOP_K = 5
+# Corpus queried when no corpus_name is given
+FIXED_CORPUS_DISPLAY_NAME = "MyVertexRagCorpus"
 
 # Retry config
+# Only retry transient errors; permanent failures (bad request, not found,
+# permission denied) fail immediately instead of burning the deadline
+RAG_RETRY_PREDICATE = retry.if_exception_type(
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.TooManyRequests,
+)
+
+# Short initial backoff: queries are latency-sensitive
 RAG_RETRY = retry.Retry(
-    predicate=retry.if_exception_type(),
-    initial=1.0,
+    predicate=RAG_RETRY_PREDICATE,
+    initial=0.2,
     maximum=10.0,
-    multiplier=2.0,
+    multiplier=1.5,
     deadline=120.0,
 )
 
+# Async counterpart of RAG_RETRY, used when the SDK exposes retrieve_async
+RAG_RETRY_ASYNC = retry_async.AsyncRetry(
+    predicate=RAG_RETRY_PREDICATE,
+    initial=0.2,
+    maximum=10.0,
+    multiplier=1.5,
+    deadline=120.0,
+)
+
+# Maximum number of in-flight retrieval requests for batched queries
+DEFAULT_MAX_CONCURRENCY = 16
+
+# Query result cache config
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_TTL_SECONDS = 3600.0
+# Minimum cosine similarity for serving a near-duplicate query from cache
+SEMANTIC_CACHE_THRESHOLD = 0.97
+SEMANTIC_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# HNSW index over cached embeddings (used when faiss is installed)
+SEMANTIC_CACHE_HNSW_M = 32
+SEMANTIC_CACHE_HNSW_EF_CONSTRUCTION = 200
+SEMANTIC_CACHE_HNSW_EF_SEARCH = 64
+# Neighbors fetched per lookup; some may be evicted or in another scope
+SEMANTIC_CACHE_SEARCH_K = 8
+
+# Root directory for on-disk query data; override with RAG_CACHE_DIR
+RAG_CACHE_DIR = os.environ.get(
+    "RAG_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rag")
+)
+
+# Warm query store config: frequent queries are pre-retrieved into an
+# on-disk JSON store and served without any RPC
+WARM_QUERIES_PATH = os.environ.get(
+    "RAG_WARM_QUERIES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_queries.jsonl"),
+)
+WARM_STORE_PATH = os.environ.get(
+    "RAG_WARM_STORE_PATH", os.path.join(RAG_CACHE_DIR, "warm_query_store.json")
+)
+WARM_REFRESH_SECONDS = 3600.0
+
+# How often the background thread re-lists corpora to pick up renames
+# and newly created corpora
+CORPUS_REFRESH_SECONDS = 300.0
+
+# Persistent disk cache config: survives restarts, so replayed query sets
+# (e.g. evaluation runs) don't hit Vertex AI again
+DISK_CACHE_DIR = os.environ.get(
+    "RAG_DISK_CACHE_DIR", os.path.join(RAG_CACHE_DIR, "queries")
+)
+DISK_CACHE_TTL_SECONDS = 24 * 3600.0
+
+# Hybrid retrieval config: over-fetch candidates and re-rank them with a
+# local cross-encoder
+HYBRID_CANDIDATE_MULTIPLIER = 4
+# With bm25_prefilter=True, only the top_k * HYBRID_LEXICAL_MULTIPLIER
+# lexically strongest candidates reach the cross-encoder
+HYBRID_LEXICAL_MULTIPLIER = 2
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# ============================================================
+# RESULT TYPE
+# ============================================================
+@dataclass(slots=True, frozen=True)
+class RagHit:
+    """
+    A single retrieved passage.
+    """
+    text: str
+    source_uri: str
+    score: float
+
+
+# ============================================================
+# VERTEX AI INITIALIZATION (ONCE PER PROCESS)
+# ============================================================
+_INITIALIZED = False
+_INIT_LOCK = threading.Lock()
+
+
+def _ensure_vertexai_initialized() -> None:
+    """
+    Initializes the Vertex AI SDK on first use.
+    Later calls return immediately without taking the lock.
+    """
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+
+    with _INIT_LOCK:
+        if _INITIALIZED:
+            return
+        vertexai.init(project=PROJECT_ID, location=LOCATION)
+        _INITIALIZED = True
+        logger.info("Vertex AI initialized")
+
+
+# ============================================================
+# PRE-BOUND SDK CALLABLES
+# ============================================================
+# Built once so the hot path doesn't re-wrap rag.retrieve per call
+_RETRIEVE = RAG_RETRY(rag.retrieve)
+_RETRIEVE_ASYNC = (
+    RAG_RETRY_ASYNC(rag.retrieve_async) if hasattr(rag, "retrieve_async") else None
+)
+_RagRetrievalConfig = rag.RagRetrievalConfig
+# Pulls (text, source_uri, score) off a context in one C-level call
+_CONTEXT_FIELDS = operator.attrgetter("text", "source_uri", "score")
+
+# ============================================================
+# RETRIEVAL CONFIG CACHE
+# ============================================================
+# top_k -> RagRetrievalConfig; only a handful of top_k values are ever used
+_RETRIEVAL_CONFIGS: Dict[int, rag.RagRetrievalConfig] = {
+    DEFAULT_TOP_K: _RagRetrievalConfig(top_k=DEFAULT_TOP_K),
+}
+
+
+def _get_retrieval_config(top_k: int) -> rag.RagRetrievalConfig:
+    """
+    Returns a shared RagRetrievalConfig for the given top_k.
+    """
+    config = _RETRIEVAL_CONFIGS.get(top_k)
+    if config is None:
+        config = _RETRIEVAL_CONFIGS.setdefault(
+            top_k, _RagRetrievalConfig(top_k=top_k)
+        )
+    return config
+
+
+# ============================================================
+# CORPUS NAME CACHE
+# ============================================================
+# display_name -> corpus resource name, built from a single list_corpora()
+# call. The dict is never mutated in place: refreshes build a new one and
+# swap the module reference, so readers don't need the lock.
+_CORPUS_NAME_CACHE: Dict[str, str] = {}
+# Serializes refreshes only
+_CORPUS_NAME_LOCK = threading.Lock()
+_CORPUS_REFRESH_THREAD: Optional[threading.Thread] = None
+_CORPUS_REFRESH_STOP: Optional[threading.Event] = None
+# Set by stop_corpus_refresh() so lookups don't restart the thread
+_CORPUS_REFRESH_STOPPED = False
+
+
+def _refresh_corpus_names() -> None:
+    """
+    Rebuilds the corpus name cache from rag.list_corpora().
+    Caller must hold _CORPUS_NAME_LOCK.
+
+    Display names are not unique; like a linear search, the first corpus
+    listed for a display name wins.
+    """
+    global _CORPUS_NAME_CACHE
+    names: Dict[str, str] = {}
+    for corpus in rag.list_corpora():
+        names.setdefault(corpus.display_name, corpus.name)
+    _CORPUS_NAME_CACHE = names
+
+
+def _corpus_refresh_loop(interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            _ensure_vertexai_initialized()
+            with _CORPUS_NAME_LOCK:
+                _refresh_corpus_names()
+        except Exception as e:
+            logger.warning("Corpus name refresh failed: %s", e)
+
+
+def start_corpus_refresh(interval: float = CORPUS_REFRESH_SECONDS) -> None:
+    """
+    Starts a background daemon thread that rebuilds the corpus name cache
+    every `interval` seconds, so renamed or newly created corpora are
+    picked up without a query paying for list_corpora().
+    Does nothing if the thread is already running.
+
+    Lookups start the thread automatically; calling this explicitly also
+    re-enables it after stop_corpus_refresh().
+    """
+    global _CORPUS_REFRESH_THREAD, _CORPUS_REFRESH_STOP, _CORPUS_REFRESH_STOPPED
+    if _CORPUS_REFRESH_THREAD is not None:
+        return
+
+    with _CORPUS_NAME_LOCK:
+        _CORPUS_REFRESH_STOPPED = False
+        if _CORPUS_REFRESH_THREAD is not None:
+            return
+        _CORPUS_REFRESH_STOP = threading.Event()
+        _CORPUS_REFRESH_THREAD = threading.Thread(
+            target=_corpus_refresh_loop,
+            args=(interval, _CORPUS_REFRESH_STOP),
+            name="rag-corpus-refresh",
+            daemon=True,
+        )
+        _CORPUS_REFRESH_THREAD.start()
+
+
+def stop_corpus_refresh() -> None:
+    """
+    Stops the background corpus name refresh, if running. Later lookups
+    don't restart it; call start_corpus_refresh() to turn it back on.
+    """
+    global _CORPUS_REFRESH_THREAD, _CORPUS_REFRESH_STOP, _CORPUS_REFRESH_STOPPED
+    with _CORPUS_NAME_LOCK:
+        _CORPUS_REFRESH_STOPPED = True
+        if _CORPUS_REFRESH_STOP is not None:
+            _CORPUS_REFRESH_STOP.set()
+        _CORPUS_REFRESH_THREAD = None
+        _CORPUS_REFRESH_STOP = None
+
+
+def invalidate_corpus_cache() -> None:
+    """
+    Clears the cached display name -> resource name mapping.
+    Call this after a corpus is deleted or recreated.
+    """
+    global _CORPUS_NAME_CACHE
+    with _CORPUS_NAME_LOCK:
+        _CORPUS_NAME_CACHE = {}
+    logger.info("Corpus name cache invalidated")
+
+
 # ============================================================
 # HELPER: GET CORPUS BY DISPLAY NAME
 # ============================================================
@@ -29,76 +319,1069 @@ def get_corpus_by_display_name(display_name: str) -> str:
     """
     Returns the corpus resource name for a given display name.
     Raises an error if not found.
+
+    Lookups are served from an in-process cache kept fresh by a
+    background thread; rag.list_corpora() is only called inline when the
+    display name has not been seen yet.
+    """
+    corpus_name = _CORPUS_NAME_CACHE.get(display_name)
+    if corpus_name is not None:
+        return corpus_name
+
+    with _CORPUS_NAME_LOCK:
+        # Another thread may have refreshed the cache while we waited
+        corpus_name = _CORPUS_NAME_CACHE.get(display_name)
+        if corpus_name is None:
+            logger.info("Searching for corpus with display name: %s", display_name)
+            _refresh_corpus_names()
+            corpus_name = _CORPUS_NAME_CACHE.get(display_name)
+
+    # Keep the cache fresh from now on without blocking queries
+    if not _CORPUS_REFRESH_STOPPED:
+        start_corpus_refresh()
+
+    if corpus_name is None:
+        raise ValueError(f"RAG corpus with display name '{display_name}' not found")
+
+    logger.debug("Found corpus: %s", corpus_name)
+    return corpus_name
+
+
+# ============================================================
+# QUERY RESULT CACHE (EXACT + SEMANTIC)
+# ============================================================
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class _QueryResultCache:
+    """
+    LRU cache of retrieval results keyed by (corpus_name, top_k, query).
+
+    Exact hits are matched on the normalized query text. When numpy and
+    sentence-transformers are installed, near-duplicate queries are also
+    served if their embedding cosine similarity with a cached query is at
+    least SEMANTIC_CACHE_THRESHOLD. Embeddings are computed locally with
+    an ONNX MiniLM model. The model is downloaded from the Hugging Face hub
+    the first time it is loaded; call preload_query_cache_model() at
+    startup so that doesn't happen inside a user query.
+
+    Cached embeddings are stored as int8 with a per-row scale, which is
+    4x smaller than float32; similarities are only converted back to
+    float for the threshold comparison.
+
+    With faiss installed, lookups go through an 8-bit HNSW index instead
+    of a linear scan. HNSW can't delete vectors, so evicted rows stay in
+    the index as tombstones until it is rebuilt from the live slots.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = QUERY_CACHE_TTL_SECONDS,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+    ):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._threshold = threshold
+        self._lock = threading.Lock()
+
+        # key -> (expires_at, results, slot)
+        self._entries: "OrderedDict[Tuple[str, int, str], tuple]" = OrderedDict()
+
+        # Semantic index: one embedding row per slot, tagged with a scope id
+        # so only entries for the same (corpus_name, top_k) can match.
+        self._model = None
+        self._model_failed = False
+        self._model_lock = threading.Lock()
+        self._embeddings = None
+        self._scales = None
+        self._slot_scopes = None
+        self._slot_keys: List[Optional[Tuple[str, int, str]]] = []
+        self._free_slots: List[int] = []
+        self._scope_ids: Dict[Tuple[str, int], int] = {}
+
+        # HNSW index row -> slot, and slot -> its current row (-1 if none)
+        self._index = None
+        self._row_slots: List[int] = []
+        self._slot_rows: List[int] = []
+
+    # ---------------- semantic helpers ----------------
+    def _get_model(self):
+        if self._model is not None or self._model_failed:
+            return self._model
+
+        with self._model_lock:
+            if self._model is not None or self._model_failed:
+                return self._model
+            if np is None or SentenceTransformer is None:
+                self._model_failed = True
+                logger.info("Semantic query cache disabled (numpy / sentence-transformers missing)")
+                return None
+            try:
+                self._model = SentenceTransformer(SEMANTIC_CACHE_MODEL, backend="onnx")
+            except Exception as e:
+                self._model_failed = True
+                logger.warning("Semantic query cache disabled: %s", e)
+        return self._model
+
+    def _embed(self, query: str):
+        model = self._get_model()
+        if model is None:
+            return None
+        vector = model.encode(query, normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+
+    @staticmethod
+    def _quantize(embedding):
+        """
+        Returns (int8 vector, scale) such that vector * scale ~= embedding.
+        """
+        max_abs = float(np.max(np.abs(embedding)))
+        if max_abs == 0.0:
+            return np.zeros(embedding.shape, dtype=np.int8), 0.0
+        scale = max_abs / 127.0
+        quantized = np.clip(np.round(embedding / scale), -127, 127).astype(np.int8)
+        return quantized, scale
+
+    def _allocate_slot(self, dim: int) -> int:
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self._max_entries, dim), dtype=np.int8)
+            self._scales = np.zeros(self._max_entries, dtype=np.float32)
+            self._slot_scopes = np.full(self._max_entries, -1, dtype=np.int32)
+            self._slot_keys = [None] * self._max_entries
+            self._free_slots = list(range(self._max_entries - 1, -1, -1))
+            self._slot_rows = [-1] * self._max_entries
+        return self._free_slots.pop()
+
+    def _release_slot(self, slot: Optional[int]) -> None:
+        if slot is None:
+            return
+        self._slot_scopes[slot] = -1
+        self._slot_keys[slot] = None
+        self._slot_rows[slot] = -1
+        self._free_slots.append(slot)
+
+    # ---------------- HNSW index ----------------
+    def _new_index(self, dim: int):
+        index = faiss.IndexHNSWSQ(
+            dim,
+            faiss.ScalarQuantizer.QT_8bit,
+            SEMANTIC_CACHE_HNSW_M,
+            faiss.METRIC_INNER_PRODUCT,
+        )
+        index.hnsw.efConstruction = SEMANTIC_CACHE_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = SEMANTIC_CACHE_HNSW_EF_SEARCH
+        # Embeddings are unit-normalized, so every component is in [-1, 1]
+        index.train(np.stack([-np.ones(dim), np.ones(dim)]).astype(np.float32))
+        return index
+
+    def _index_add(self, slot: int) -> None:
+        if faiss is None:
+            return
+
+        if self._index is None or self._index.ntotal >= 2 * self._max_entries:
+            self._rebuild_index()
+            return
+
+        vector = self._embeddings[slot].astype(np.float32) * self._scales[slot]
+        self._slot_rows[slot] = self._index.ntotal
+        self._row_slots.append(slot)
+        self._index.add(vector.reshape(1, -1))
+
+    def _rebuild_index(self) -> None:
+        """
+        Rebuilds the HNSW index from the live slots, dropping tombstones.
+        """
+        live = np.flatnonzero(self._slot_scopes >= 0)
+        self._index = self._new_index(self._embeddings.shape[1])
+        self._row_slots = [int(slot) for slot in live]
+        self._slot_rows = [-1] * self._max_entries
+        for row, slot in enumerate(self._row_slots):
+            self._slot_rows[slot] = row
+        if len(live):
+            vectors = self._embeddings[live].astype(np.float32) * self._scales[live, None]
+            self._index.add(vectors)
+
+    def _nearest_indexed(self, scope_id: int, embedding):
+        k = min(SEMANTIC_CACHE_SEARCH_K, self._index.ntotal)
+        if k == 0:
+            return None
+
+        scores, rows = self._index.search(embedding.reshape(1, -1), k)
+        for score, row in zip(scores[0], rows[0]):
+            if score < self._threshold:
+                break
+            if row < 0:
+                continue
+            slot = self._row_slots[row]
+            if self._slot_rows[slot] == row and self._slot_scopes[slot] == scope_id:
+                return self._slot_keys[slot]
+        return None
+
+    def _nearest(self, scope: Tuple[str, int], embedding):
+        """
+        Returns the cache key of the most similar query in the same scope.
+        """
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or self._embeddings is None:
+            return None
+
+        if self._index is not None:
+            return self._nearest_indexed(scope_id, embedding)
+
+        quantized, scale = self._quantize(embedding)
+        # Integer dot products, accumulated in int32 to avoid overflow
+        dots = np.matmul(self._embeddings, quantized, dtype=np.int32)
+        scores = dots * (self._scales * scale)
+        scores[self._slot_scopes != scope_id] = -1.0
+        slot = int(np.argmax(scores))
+        if scores[slot] < self._threshold:
+            return None
+        return self._slot_keys[slot]
+
+    def _evict(self, key) -> None:
+        _, _, slot = self._entries.pop(key)
+        self._release_slot(slot)
+
+    # ---------------- public API ----------------
+    def get(self, corpus_name: str, top_k: int, query: str):
+        """
+        Returns results cached for exactly this normalized query, or None.
+        Never runs the embedding model.
+        """
+        key = (corpus_name, top_k, _normalize_query(query))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                self._evict(key)
+        return None
+
+    def lookup_similar(self, corpus_name: str, top_k: int, query: str):
+        """
+        Embeds the query and returns (results, embedding) for the nearest
+        cached query in scope. results is None on a miss; the embedding
+        should be passed back to store() to avoid re-encoding the query.
+        """
+        embedding = self._embed(_normalize_query(query))
+        if embedding is None:
+            return None, None
+
+        now = time.monotonic()
+
+        with self._lock:
+            match = self._nearest((corpus_name, top_k), embedding)
+            if match is not None:
+                entry = self._entries.get(match)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(match)
+                    logger.debug("Semantic cache hit")
+                    return entry[1], embedding
+
+        return None, embedding
+
+    def store(
+        self,
+        corpus_name: str,
+        top_k: int,
+        query: str,
+        results,
+        embedding=None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Caches results for the query. ttl_seconds can only shorten the
+        cache's own TTL, e.g. for results that expire elsewhere sooner.
+        """
+        key = (corpus_name, top_k, _normalize_query(query))
+        ttl = self._ttl_seconds if ttl_seconds is None else min(ttl_seconds, self._ttl_seconds)
+        expires_at = time.monotonic() + ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            while len(self._entries) >= self._max_entries:
+                self._evict(next(iter(self._entries)))
+
+            slot = None
+            if embedding is not None:
+                slot = self._allocate_slot(embedding.shape[0])
+                scope_id = self._scope_ids.setdefault((corpus_name, top_k), len(self._scope_ids))
+                self._embeddings[slot], self._scales[slot] = self._quantize(embedding)
+                self._slot_scopes[slot] = scope_id
+                self._slot_keys[slot] = key
+                self._index_add(slot)
+
+            self._entries[key] = (expires_at, results, slot)
+
+    def preload(self) -> bool:
+        """
+        Loads the embedding model now. Returns False if the semantic
+        cache is unavailable.
+        """
+        return self._get_model() is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+
+_QUERY_CACHE = _QueryResultCache()
+
+
+def preload_query_cache_model() -> bool:
+    """
+    Loads (and, on first run, downloads) the semantic cache embedding
+    model. Call this at startup to keep model loading out of the first
+    query. Returns False if the semantic cache is unavailable.
+    """
+    return _QUERY_CACHE.preload()
+
+
+def clear_query_cache() -> None:
+    """
+    Drops all cached query results.
     """
-    logger.info(f"Searching for corpus with display name: {display_name}")
-    
-    corpora = rag.list_corpora()
-    for corpus in corpora:
-        if corpus.display_name == display_name:
-            logger.info(f"Found corpus: {corpus.name}")
-            return corpus.name
+    _QUERY_CACHE.clear()
+    logger.info("Query result cache cleared")
 
-    raise ValueError(f"RAG corpus with display name '{display_name}' not found")
+
+# ============================================================
+# INTERNAL HELPERS
+# ============================================================
+def _resolve_corpus_name(corpus_name: Optional[str]) -> str:
+    """
+    Returns the full corpus resource name, resolving display names.
+    """
+    if corpus_name is None:
+        corpus_name = FIXED_CORPUS_DISPLAY_NAME
+
+    # If user passed a display name instead of full resource name
+    if not corpus_name.startswith("projects/"):
+        corpus_name = get_corpus_by_display_name(corpus_name)
+
+    return corpus_name
+
+
+def _contexts_to_results(contexts) -> List[RagHit]:
+    """
+    Converts retrieved contexts into RagHit objects.
+    """
+    return list(starmap(RagHit, map(_CONTEXT_FIELDS, contexts)))
+
+
+def _retrieve_contexts(corpus_name: str, query: str, top_k: int):
+    """
+    Sends a single retrieval request for an already resolved corpus name
+    and returns the raw contexts.
+    """
+    contexts = _RETRIEVE(
+        corpus_name=corpus_name,
+        query=query,
+        retrieval_config=_get_retrieval_config(top_k),
+    ).contexts
+    logger.debug("Retrieved %d contexts", len(contexts))
+
+    return contexts
+
+
+def _retrieve(corpus_name: str, query: str, top_k: int) -> List[RagHit]:
+    return _contexts_to_results(_retrieve_contexts(corpus_name, query, top_k))
+
+
+def _query_key(corpus_name: str, top_k: int, query: str) -> str:
+    """
+    Stable key for persisted results (warm store and disk cache).
+    """
+    raw = f"{corpus_name}|{top_k}|{_normalize_query(query)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# Hits are persisted as plain [text, source_uri, score] rows rather than
+# pickles, so stored data doesn't depend on this module's import path
+def _hits_to_rows(results: List[RagHit]) -> list:
+    return [(hit.text, hit.source_uri, hit.score) for hit in results]
+
+
+def _rows_to_hits(rows) -> List[RagHit]:
+    return list(starmap(RagHit, rows))
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(payload: bytes):
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+def _dump_hits(results: List[RagHit]) -> bytes:
+    return _dumps(_hits_to_rows(results))
+
+
+def _load_hits(payload: bytes) -> List[RagHit]:
+    return _rows_to_hits(_loads(payload))
+
+
+# ============================================================
+# HYBRID RE-RANKING
+# ============================================================
+_RERANKER = None
+_RERANKER_FAILED = False
+_RERANKER_LOCK = threading.Lock()
+
+
+def _get_reranker():
+    global _RERANKER, _RERANKER_FAILED
+    if _RERANKER is not None or _RERANKER_FAILED:
+        return _RERANKER
+
+    with _RERANKER_LOCK:
+        if _RERANKER is not None or _RERANKER_FAILED:
+            return _RERANKER
+        if CrossEncoder is None:
+            _RERANKER_FAILED = True
+            logger.info("Cross-encoder re-ranking disabled (sentence-transformers missing)")
+            return None
+        try:
+            _RERANKER = CrossEncoder(RERANK_MODEL)
+        except Exception as e:
+            _RERANKER_FAILED = True
+            logger.warning("Cross-encoder re-ranking disabled: %s", e)
+    return _RERANKER
+
+
+def _lexical_prefilter(query: str, candidates: List[RagHit], keep: int) -> List[RagHit]:
+    """
+    Keeps the `keep` candidates with the highest BM25 score for the query.
+    Candidates are returned unchanged if rank-bm25 is not installed.
+    """
+    if BM25Okapi is None or len(candidates) <= keep:
+        return candidates
+
+    bm25 = BM25Okapi([_normalize_query(hit.text).split() for hit in candidates])
+    scores = bm25.get_scores(_normalize_query(query).split())
+    order = sorted(range(len(candidates)), key=scores.__getitem__, reverse=True)
+    # Stable on ties, so vector order still decides between equal scores
+    return [candidates[i] for i in sorted(order[:keep])]
+
+
+def _rerank(
+    query: str,
+    candidates: List[RagHit],
+    top_k: int,
+    bm25_prefilter: bool = False,
+) -> List[RagHit]:
+    """
+    Re-ranks vector candidates with a local cross-encoder, optionally
+    after a BM25 cut. Re-ranked hits carry the cross-encoder score. Falls
+    back to vector order for any stage whose dependency is missing.
+    """
+    if bm25_prefilter:
+        candidates = _lexical_prefilter(
+            query, candidates, top_k * HYBRID_LEXICAL_MULTIPLIER
+        )
+
+    reranker = _get_reranker()
+    if reranker is None or len(candidates) <= 1:
+        return candidates[:top_k]
+
+    scores = reranker.predict([(query, hit.text) for hit in candidates])
+    order = sorted(range(len(candidates)), key=scores.__getitem__, reverse=True)
+    return [replace(candidates[i], score=float(scores[i])) for i in order[:top_k]]
+
+
+# ============================================================
+# WARM QUERY STORE (PRECOMPUTED FREQUENT QUERIES)
+# ============================================================
+# Each line of WARM_QUERIES_PATH is a JSON object:
+#   {"query": "...", "corpus_name": "...", "top_k": 5}
+# top_k is optional and defaults to DEFAULT_TOP_K.
+#
+# WARM_STORE_PATH holds, as JSON:
+#   {"expires_at": <unix time>, "entries": {key: [[text, source_uri, score], ...]}}
+# It is read into memory once and rewritten atomically on refresh. The
+# in-memory (expires_at, entries) tuple is swapped wholesale, so lookups
+# don't need the lock. An expired store is ignored, so results from an
+# old run are never served once no process refreshes them.
+_WARM_STORE: Tuple[float, Dict[str, List[RagHit]]] = (0.0, {})
+# Serializes refreshes and start/stop of the refresh thread
+_WARM_STORE_LOCK = threading.Lock()
+_WARM_REFRESH_THREAD: Optional[threading.Thread] = None
+_WARM_REFRESH_STOP: Optional[threading.Event] = None
+
+
+def _read_warm_store(path: str) -> Tuple[float, Dict[str, List[RagHit]]]:
+    with open(path, "rb") as f:
+        stored = _loads(f.read())
+    entries = {key: _rows_to_hits(rows) for key, rows in stored["entries"].items()}
+    return stored["expires_at"], entries
+
+
+def _write_warm_store(
+    path: str, expires_at: float, entries: Dict[str, List[RagHit]]
+) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = _dumps({
+        "expires_at": expires_at,
+        "entries": {key: _hits_to_rows(hits) for key, hits in entries.items()},
+    })
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    # Readers in other processes see either the old or the new file
+    os.replace(tmp_path, path)
+
+
+def _warm_lookup(corpus_name: str, top_k: int, query: str) -> Optional[List[RagHit]]:
+    """
+    Returns precomputed results for a warm query, or None.
+    """
+    expires_at, entries = _WARM_STORE
+    if not entries or time.time() >= expires_at:
+        return None
+    return entries.get(_query_key(corpus_name, top_k, query))
+
+
+def _load_warm_queries(path: str) -> List[dict]:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def refresh_warm_queries(
+    path: str = WARM_QUERIES_PATH,
+    max_age: float = WARM_REFRESH_SECONDS,
+) -> int:
+    """
+    Retrieves every query listed in the warm queries file and replaces the
+    warm store with the results. Queries no longer listed are dropped; a
+    listed query that fails to refresh keeps its previous results. If the
+    queries file is gone, the warm store is cleared.
+
+    Args:
+        path: Path to the warm queries JSONL file
+        max_age: Seconds the refreshed store may be served for
+
+    Returns:
+        Number of queries stored
+    """
+    global _WARM_STORE
+
+    if not os.path.exists(path):
+        logger.info("No warm queries file found at: %s", path)
+        with _WARM_STORE_LOCK:
+            _WARM_STORE = (0.0, {})
+            if os.path.exists(WARM_STORE_PATH):
+                os.remove(WARM_STORE_PATH)
+        return 0
+
+    _ensure_vertexai_initialized()
+
+    previous = _WARM_STORE[1]
+    fresh = {}
+    for entry in _load_warm_queries(path):
+        query = entry["query"]
+        top_k = entry.get("top_k", DEFAULT_TOP_K)
+        try:
+            corpus_name = _resolve_corpus_name(entry.get("corpus_name"))
+        except Exception as e:
+            logger.warning("Failed to warm query '%s': %s", query, e)
+            continue
+
+        key = _query_key(corpus_name, top_k, query)
+        try:
+            fresh[key] = _retrieve(corpus_name, query, top_k)
+        except Exception as e:
+            logger.warning("Failed to warm query '%s': %s", query, e)
+            if key in previous:
+                fresh[key] = previous[key]
+
+    expires_at = time.time() + max_age
+    with _WARM_STORE_LOCK:
+        _write_warm_store(WARM_STORE_PATH, expires_at, fresh)
+        _WARM_STORE = (expires_at, fresh)
+
+    logger.info("Warm query store refreshed with %d queries", len(fresh))
+    return len(fresh)
+
+
+def _warm_refresh_loop(path: str, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            refresh_warm_queries(path, interval)
+        except Exception as e:
+            logger.warning("Warm query refresh failed: %s", e)
+
+
+def start_warm_query_refresh(
+    path: str = WARM_QUERIES_PATH,
+    interval: float = WARM_REFRESH_SECONDS,
+) -> None:
+    """
+    Refreshes the warm store now and then every `interval` seconds on a
+    background daemon thread, so it tracks corpus updates.
+    Does nothing if the thread is already running.
+    """
+    global _WARM_REFRESH_THREAD, _WARM_REFRESH_STOP
+
+    with _WARM_STORE_LOCK:
+        if _WARM_REFRESH_THREAD is not None:
+            return
+        _WARM_REFRESH_STOP = threading.Event()
+        thread = _WARM_REFRESH_THREAD = threading.Thread(
+            target=_warm_refresh_loop,
+            args=(path, interval, _WARM_REFRESH_STOP),
+            name="rag-warm-refresh",
+            daemon=True,
+        )
+
+    try:
+        refresh_warm_queries(path, interval)
+    except Exception as e:
+        logger.warning("Warm query refresh failed: %s", e)
+
+    # If stop was called meanwhile, the loop exits on its first wait
+    thread.start()
+
+
+def stop_warm_query_refresh() -> None:
+    """
+    Stops the background warm store refresh, if running.
+    A refresh already in progress finishes, but no further one starts.
+    """
+    global _WARM_REFRESH_THREAD, _WARM_REFRESH_STOP
+    with _WARM_STORE_LOCK:
+        if _WARM_REFRESH_STOP is not None:
+            _WARM_REFRESH_STOP.set()
+        _WARM_REFRESH_THREAD = None
+        _WARM_REFRESH_STOP = None
+
+
+# Reuse results from a previous run if the store on disk hasn't expired;
+# the file is only read here, never locked
+if os.path.exists(WARM_STORE_PATH):
+    try:
+        _WARM_STORE = _read_warm_store(WARM_STORE_PATH)
+    except Exception as e:
+        logger.warning("Ignoring unreadable warm query store %s: %s", WARM_STORE_PATH, e)
+
+
+# ============================================================
+# PERSISTENT DISK CACHE
+# ============================================================
+_DISK_CACHE = None
+_DISK_CACHE_FAILED = False
+_DISK_CACHE_LOCK = threading.Lock()
+
+
+def _get_disk_cache():
+    """
+    Opens the disk cache on first use.
+    Returns None if diskcache is missing or the directory is unusable.
+    """
+    global _DISK_CACHE, _DISK_CACHE_FAILED
+    if _DISK_CACHE is not None or _DISK_CACHE_FAILED:
+        return _DISK_CACHE
+
+    with _DISK_CACHE_LOCK:
+        if _DISK_CACHE is not None or _DISK_CACHE_FAILED:
+            return _DISK_CACHE
+        if diskcache is None:
+            _DISK_CACHE_FAILED = True
+            logger.info("Disk query cache disabled (diskcache missing)")
+            return None
+        try:
+            _DISK_CACHE = diskcache.Cache(DISK_CACHE_DIR)
+        except Exception as e:
+            _DISK_CACHE_FAILED = True
+            logger.warning("Disk query cache disabled: %s", e)
+    return _DISK_CACHE
+
+
+def _close_disk_cache() -> None:
+    global _DISK_CACHE
+    with _DISK_CACHE_LOCK:
+        if _DISK_CACHE is not None:
+            _DISK_CACHE.close()
+            _DISK_CACHE = None
+
+
+def _disk_lookup(corpus_name: str, top_k: int, query: str):
+    """
+    Returns (results, seconds until the entry expires) for results
+    persisted by a previous run, or (None, None).
+    """
+    cache = _get_disk_cache()
+    if cache is None:
+        return None, None
+    payload, expire_time = cache.get(
+        _query_key(corpus_name, top_k, query), expire_time=True
+    )
+    if payload is None:
+        return None, None
+    remaining = None if expire_time is None else expire_time - time.time()
+    return _load_hits(payload), remaining
+
+
+def _disk_store(corpus_name: str, top_k: int, query: str, results: List[RagHit]) -> None:
+    cache = _get_disk_cache()
+    if cache is None:
+        return
+    cache.set(
+        _query_key(corpus_name, top_k, query),
+        _dump_hits(results),
+        expire=DISK_CACHE_TTL_SECONDS,
+    )
+
+
+def _cache_lookup(corpus_name: str, top_k: int, query: str):
+    """
+    Checks the exact in-memory and disk entries first, and only then runs
+    the embedding model for a semantic match.
+    Returns (results, embedding) like _QueryResultCache.lookup_similar().
+    """
+    cached = _QUERY_CACHE.get(corpus_name, top_k, query)
+    if cached is not None:
+        return cached, None
+
+    cached, remaining = _disk_lookup(corpus_name, top_k, query)
+    if cached is not None:
+        logger.debug("Disk cache hit")
+        # Don't let the in-memory copy outlive the disk entry
+        _QUERY_CACHE.store(corpus_name, top_k, query, cached, ttl_seconds=remaining)
+        return cached, None
+
+    return _QUERY_CACHE.lookup_similar(corpus_name, top_k, query)
+
+
+def _cache_store(corpus_name: str, top_k: int, query: str, results, embedding=None) -> None:
+    _QUERY_CACHE.store(corpus_name, top_k, query, results, embedding)
+    _disk_store(corpus_name, top_k, query, results)
+
+
+def clear_disk_cache() -> None:
+    """
+    Drops all results persisted in the disk cache.
+    """
+    cache = _get_disk_cache()
+    if cache is not None:
+        cache.clear()
+        logger.info("Disk query cache cleared")
+
+
+atexit.register(_close_disk_cache)
 
 
 # ============================================================
 # RAG QUERY FUNCTION (INDEPENDENT)
 # ============================================================
+def iter_rag_corpus(
+    query: str,
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    force_refresh: bool = False,
+) -> Iterator[RagHit]:
+    """
+    Queries a RAG corpus and yields retrieved chunks one at a time.
+
+    Callers that only need the first few hits (e.g. a reranking cutoff)
+    can stop early with itertools.islice(). A single retrieval returns
+    all top_k contexts at once, so results are cached as soon as they
+    arrive, even if the caller stops early.
+
+    Args:
+        query: User query text
+        corpus_name: Name or display name of the corpus
+            (defaults to FIXED_CORPUS_DISPLAY_NAME)
+        top_k: Number of chunks to retrieve
+        force_refresh: Skip all caches and re-retrieve from Vertex AI
+
+    Yields:
+        Retrieved passages with metadata, best first
+    """
+    # Initialize Vertex AI on the first query only
+    _ensure_vertexai_initialized()
+
+    # Resolve corpus name if a display name is given
+    corpus_name = _resolve_corpus_name(corpus_name)
+
+    embedding = None
+    if not force_refresh:
+        warm = _warm_lookup(corpus_name, top_k, query)
+        if warm is not None:
+            logger.debug("Serving %d contexts from warm query store", len(warm))
+            yield from warm
+            return
+
+        cached, embedding = _cache_lookup(corpus_name, top_k, query)
+        if cached is not None:
+            logger.debug("Serving %d contexts from query cache", len(cached))
+            yield from cached
+            return
+
+    logger.debug("Sending retrieval request to Vertex AI RAG")
+    results = _retrieve(corpus_name, query, top_k)
+    _cache_store(corpus_name, top_k, query, results, embedding)
+
+    yield from results
+
+
 def query_rag_corpus(
     query: str,
-    corpus_name: str = None,
-    top_k: int = 5,
-) -> List[dict]:
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    force_refresh: bool = False,
+    hybrid: bool = False,
+    bm25_prefilter: bool = False,
+) -> List[RagHit]:
     """
     Queries a RAG corpus and returns retrieved chunks.
 
     Args:
         query: User query text
         corpus_name: Name or display name of the corpus
+            (defaults to FIXED_CORPUS_DISPLAY_NAME)
         top_k: Number of chunks to retrieve
+        force_refresh: Skip all caches and re-retrieve from Vertex AI
+        hybrid: Retrieve top_k * HYBRID_CANDIDATE_MULTIPLIER candidates
+            and re-rank them locally with a cross-encoder
+        bm25_prefilter: With hybrid, keep only the lexically strongest
+            candidates before the cross-encoder (faster, may drop hits
+            that share no terms with the query)
 
     Returns:
         List of retrieved passages with metadata
     """
-    logger.info("------------------------------------------------------------")
-    logger.info("Entering query_rag_corpus()")
-    logger.info(f"Query: {query}")
-    logger.info(f"Top K: {top_k}")
+    logger.debug("query_rag_corpus(query=%r, top_k=%d)", query, top_k)
 
-    # Initialize Vertex AI if not already initialized
-    try:
-        vertexai.init(project=PROJECT_ID, location=LOCATION)
-        logger.info("Vertex AI initialized")
-    except Exception as e:
-        logger.warning(f"Vertex AI may already be initialized: {e}")
+    if hybrid:
+        candidates = list(
+            iter_rag_corpus(
+                query, corpus_name, top_k * HYBRID_CANDIDATE_MULTIPLIER, force_refresh
+            )
+        )
+        results = _rerank(query, candidates, top_k, bm25_prefilter)
+    else:
+        results = list(iter_rag_corpus(query, corpus_name, top_k, force_refresh))
 
-    # Resolve corpus name if a display name is given
-    if corpus_name is None:
-        raise ValueError("corpus_name must be provided")
+    return results
 
-    # If user passed a display name instead of full resource name
-    if not corpus_name.startswith("projects/"):
-        corpus_name = get_corpus_by_display_name(corpus_name)
 
-    retrieval_config = rag.RagRetrievalConfig(top_k=top_k)
-    logger.info("Sending retrieval request to Vertex AI RAG")
+# ============================================================
+# SERIALIZED RESULTS (FOR HTTP / RPC RESPONSES)
+# ============================================================
+def query_rag_corpus_json(
+    query: str,
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    force_refresh: bool = False,
+    hybrid: bool = False,
+    bm25_prefilter: bool = False,
+) -> bytes:
+    """
+    Same as query_rag_corpus() but returns the results as UTF-8 JSON:
+    a list of {"text", "source_uri", "score"} objects.
 
-    response = RAG_RETRY(rag.retrieve)(
+    With orjson installed the RagHit dataclasses are serialized directly,
+    without building intermediate dicts.
+    """
+    results = query_rag_corpus(
+        query, corpus_name, top_k, force_refresh, hybrid, bm25_prefilter
+    )
+    if orjson is not None:
+        return orjson.dumps(results)
+    return json.dumps([asdict(hit) for hit in results]).encode("utf-8")
+
+
+def query_rag_corpus_msgpack(
+    query: str,
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    force_refresh: bool = False,
+    hybrid: bool = False,
+    bm25_prefilter: bool = False,
+) -> bytes:
+    """
+    Same as query_rag_corpus_json() but encoded with msgpack, which gives
+    smaller payloads for RPC callers.
+    Raises ImportError if msgpack is not installed.
+    """
+    if msgpack is None:
+        raise ImportError("msgpack is required for query_rag_corpus_msgpack()")
+
+    results = query_rag_corpus(
+        query, corpus_name, top_k, force_refresh, hybrid, bm25_prefilter
+    )
+    return msgpack.packb(
+        [
+            {"text": hit.text, "source_uri": hit.source_uri, "score": hit.score}
+            for hit in results
+        ]
+    )
+
+
+# ============================================================
+# ASYNC / BATCHED RAG QUERIES
+# ============================================================
+def _lookup_stored(corpus_name: str, top_k: int, query: str):
+    """
+    Checks the warm store, then the query caches.
+    Returns (results, embedding) like _cache_lookup().
+    """
+    warm = _warm_lookup(corpus_name, top_k, query)
+    if warm is not None:
+        return warm, None
+    return _cache_lookup(corpus_name, top_k, query)
+
+
+async def aquery_rag_corpus(
+    query: str,
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    force_refresh: bool = False,
+    hybrid: bool = False,
+    bm25_prefilter: bool = False,
+) -> List[RagHit]:
+    """
+    Async version of query_rag_corpus().
+
+    Uses rag.retrieve_async when the SDK provides it, otherwise runs the
+    blocking call in a worker thread.
+
+    Args:
+        query: User query text
+        corpus_name: Name or display name of the corpus
+            (defaults to FIXED_CORPUS_DISPLAY_NAME)
+        top_k: Number of chunks to retrieve
+        force_refresh: Skip all caches and re-retrieve from Vertex AI
+        hybrid: Retrieve top_k * HYBRID_CANDIDATE_MULTIPLIER candidates
+            and re-rank them locally with a cross-encoder
+        bm25_prefilter: With hybrid, keep only the lexically strongest
+            candidates before the cross-encoder (faster, may drop hits
+            that share no terms with the query)
+
+    Returns:
+        List of retrieved passages with metadata
+    """
+    if hybrid:
+        candidates = await aquery_rag_corpus(
+            query, corpus_name, top_k * HYBRID_CANDIDATE_MULTIPLIER, force_refresh
+        )
+        # Cross-encoder inference is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(
+            _rerank, query, candidates, top_k, bm25_prefilter
+        )
+
+    retrieve_async = _RETRIEVE_ASYNC
+    if retrieve_async is None:
+        return await asyncio.to_thread(
+            query_rag_corpus, query, corpus_name, top_k, force_refresh
+        )
+
+    _ensure_vertexai_initialized()
+    # Batched callers pass an already resolved name; skip the thread hop
+    if corpus_name is None or not corpus_name.startswith("projects/"):
+        corpus_name = await asyncio.to_thread(_resolve_corpus_name, corpus_name)
+
+    embedding = None
+    if not force_refresh:
+        # Warm store and cache reads block, so keep them off the event loop
+        cached, embedding = await asyncio.to_thread(
+            _lookup_stored, corpus_name, top_k, query
+        )
+        # Copy so callers can't mutate the list held by the cache
+        if cached is not None:
+            return list(cached)
+
+    response = await retrieve_async(
         corpus_name=corpus_name,
         query=query,
-        retrieval_config=retrieval_config,
+        retrieval_config=_get_retrieval_config(top_k),
+    )
+
+    results = _contexts_to_results(response.contexts)
+    await asyncio.to_thread(_cache_store, corpus_name, top_k, query, results, embedding)
+
+    return list(results)
+
+
+async def aquery_rag_corpus_batch(
+    queries: List[str],
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    force_refresh: bool = False,
+    hybrid: bool = False,
+    bm25_prefilter: bool = False,
+) -> List[List[RagHit]]:
+    """
+    Runs many queries against one corpus concurrently.
+
+    Args:
+        queries: User query texts
+        corpus_name: Name or display name of the corpus
+            (defaults to FIXED_CORPUS_DISPLAY_NAME)
+        top_k: Number of chunks to retrieve per query
+        max_concurrency: Maximum number of in-flight retrieval requests
+        force_refresh: Skip all caches and re-retrieve from Vertex AI
+        hybrid: Re-rank each query's candidates, as in query_rag_corpus()
+        bm25_prefilter: BM25 cut before re-ranking, as in query_rag_corpus()
+
+    Returns:
+        One list of retrieved passages per query, in input order
+    """
+    logger.debug(
+        "Running %d queries with max_concurrency=%d", len(queries), max_concurrency
     )
 
-    logger.info(f"Retrieved {len(response.contexts)} contexts")
-    logger.info("Exiting query_rag_corpus()")
-    logger.info("------------------------------------------------------------")
+    # Resolve once so the concurrent requests don't all race on the lookup
+    _ensure_vertexai_initialized()
+    corpus_name = await asyncio.to_thread(_resolve_corpus_name, corpus_name)
 
-    results = []
-    for ctx in response.contexts:
-        results.append({
-            "text": ctx.text,
-            "source_uri": ctx.source_uri,
-            "score": ctx.score,
-        })
+    semaphore = asyncio.Semaphore(max_concurrency)
 
-    return results
\ No newline at end of file
+    async def _run(query: str) -> List[RagHit]:
+        async with semaphore:
+            return await aquery_rag_corpus(
+                query, corpus_name, top_k, force_refresh, hybrid, bm25_prefilter
+            )
+
+    return await asyncio.gather(*(_run(query) for query in queries))
+
+
+def query_rag_corpus_batch(
+    queries: List[str],
+    corpus_name: Optional[str] = None,
+    top_k: int = DEFAULT_TOP_K,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    force_refresh: bool = False,
+    hybrid: bool = False,
+    bm25_prefilter: bool = False,
+) -> List[List[RagHit]]:
+    """
+    Synchronous wrapper around aquery_rag_corpus_batch().
+    Must not be called from inside a running event loop.
+    """
+    return asyncio.run(
+        aquery_rag_corpus_batch(
+            queries,
+            corpus_name,
+            top_k,
+            max_concurrency,
+            force_refresh,
+            hybrid,
+            bm25_prefilter,
+        )
+    )
\ No newline at end of file
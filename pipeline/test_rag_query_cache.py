@@ -0,0 +1,110 @@
+"""
+Tests for the semantic query result cache in rag_query.py.
+
+Embeddings come from a fake encoder, so no model is downloaded. Every
+test runs against both the faiss HNSW index and the numpy int8 scan.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("vertexai")
+
+import rag_query
+
+DIM = 16
+
+
+def _unit(index: int, noise_index: int = None, noise: float = 0.0):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[index] = 1.0
+    if noise_index is not None:
+        vector[noise_index] = noise
+    return vector / np.linalg.norm(vector)
+
+
+# Near-duplicates ("... again") have cosine similarity ~0.995 with the
+# original, above SEMANTIC_CACHE_THRESHOLD; distinct queries are orthogonal
+VECTORS = {}
+for i in range(8):
+    VECTORS[f"q{i}"] = _unit(i)
+    VECTORS[f"q{i} again"] = _unit(i, noise_index=(i + 1) % DIM, noise=0.1)
+
+
+@pytest.fixture(params=["faiss", "numpy"])
+def make_cache(request, monkeypatch):
+    if request.param == "faiss":
+        pytest.importorskip("faiss")
+    else:
+        monkeypatch.setattr(rag_query, "faiss", None)
+
+    def _make(max_entries: int = 4):
+        cache = rag_query._QueryResultCache(max_entries=max_entries)
+        cache._embed = VECTORS.__getitem__
+        return cache
+
+    return _make
+
+
+def _store(cache, corpus_name: str, top_k: int, query: str) -> None:
+    cache.store(corpus_name, top_k, query, [query], VECTORS[query])
+
+
+def test_near_duplicate_query_is_served(make_cache):
+    cache = make_cache()
+    _store(cache, "corpus-a", 5, "q0")
+
+    results, _ = cache.lookup_similar("corpus-a", 5, "q0 again")
+    assert results == ["q0"]
+
+
+def test_scopes_are_isolated(make_cache):
+    cache = make_cache()
+    _store(cache, "corpus-a", 5, "q0")
+
+    assert cache.lookup_similar("corpus-b", 5, "q0 again")[0] is None
+    assert cache.lookup_similar("corpus-a", 3, "q0 again")[0] is None
+    assert cache.lookup_similar("corpus-a", 5, "q0 again")[0] == ["q0"]
+
+
+def test_eviction_frees_slot(make_cache):
+    cache = make_cache(max_entries=2)
+    _store(cache, "corpus-a", 5, "q0")
+    _store(cache, "corpus-a", 5, "q1")
+    assert cache._free_slots == []
+
+    # Evicts q0 (least recently used) and reuses its slot
+    _store(cache, "corpus-a", 5, "q2")
+    assert cache._free_slots == []
+    assert cache.get("corpus-a", 5, "q0") is None
+    assert cache.get("corpus-a", 5, "q2") == ["q2"]
+
+    cache.clear()
+    assert sorted(cache._free_slots) == [0, 1]
+
+
+def test_evicted_row_is_not_returned(make_cache):
+    cache = make_cache(max_entries=1)
+    _store(cache, "corpus-a", 5, "q0")
+    _store(cache, "corpus-a", 5, "q1")
+
+    if cache._index is not None:
+        # q0's row is still in the HNSW index as a tombstone
+        assert cache._index.ntotal == 2
+
+    assert cache.lookup_similar("corpus-a", 5, "q0 again")[0] is None
+    assert cache.lookup_similar("corpus-a", 5, "q1 again")[0] == ["q1"]
+
+
+def test_results_survive_index_rebuild(make_cache):
+    max_entries = 2
+    cache = make_cache(max_entries=max_entries)
+
+    for i in range(8):
+        _store(cache, "corpus-a", 5, f"q{i}")
+        if cache._index is not None:
+            assert cache._index.ntotal <= 2 * max_entries
+
+        # Only the newest max_entries queries are live
+        for j in range(i + 1):
+            expected = [f"q{j}"] if j > i - max_entries else None
+            assert cache.lookup_similar("corpus-a", 5, f"q{j} again")[0] == expected
@@ -1,10 +1,11 @@
 import logging
+import os
 import time
 from typing import List
 
 import vertexai
 from vertexai import rag
-from google.api_core import retry
+from google.api_core import exceptions, retry
 
 # ============================================================
 # LOGGING CONFIGURATION
@@ -15,70 +16,113 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger("vertex-rag-pipeline")
+# Per-file details are logged at DEBUG; set RAG_VERBOSE=1 to see them
+if os.environ.get("RAG_VERBOSE") == "1":
+    logger.setLevel(logging.DEBUG)
 
-logger.info("============================================================")
-logger.info("Vertex AI RAG Pipeline - Process Started")
-logger.info("============================================================")
+BANNER_SEPARATOR = "=" * 60
+SECTION_SEPARATOR = "-" * 60
 
 # ============================================================
 # VARIABLE INITIALIZATION
 # ============================================================
-logger.info("Initializing configuration variables")
-
 PROJECT_ID = "your-gcp-project-id"
-logger.info(f"PROJECT_ID set to: {PROJECT_ID}")
-
 LOCATION = "us-central1"
-logger.info(f"LOCATION set to: {LOCATION}")
-
 CORPUS_DISPLAY_NAME = "MyVertexRagCorpus"
-logger.info(f"CORPUS_DISPLAY_NAME set to: {CORPUS_DISPLAY_NAME}")
 
 GCS_PATHS: List[str] = [
     "gs://bucketname/file1.pdf",
     "gs://bucketname/file2.txt",
 ]
-logger.info(f"GCS_PATHS initialized with {len(GCS_PATHS)} paths")
-for path in GCS_PATHS:
-    logger.info(f"  └── GCS_PATH: {path}")
 
 # ============================================================
 # RETRY CONFIGURATION
 # ============================================================
-logger.info("Configuring retry policy for RAG operations")
+# Only retry transient errors; permanent failures (bad request, not found,
+# permission denied) fail immediately instead of burning the deadline
+RAG_RETRY_PREDICATE = retry.if_exception_type(
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.TooManyRequests,
+)
 
 RAG_RETRY = retry.Retry(
-    predicate=retry.if_exception_type(),
+    predicate=RAG_RETRY_PREDICATE,
     initial=1.0,
     maximum=10.0,
     multiplier=2.0,
     deadline=120.0,
 )
 
-logger.info(
-    "Retry policy configured | "
-    "initial=1.0s, maximum=10.0s, multiplier=2.0, deadline=120.0s"
+# create_corpus is not idempotent: after DeadlineExceeded or an internal
+# error the corpus may already exist, and retrying would create a
+# duplicate with the same display name. Only retry errors where the
+# request was rejected before any work was done.
+RAG_CREATE_RETRY = retry.Retry(
+    predicate=retry.if_exception_type(
+        exceptions.ServiceUnavailable,
+        exceptions.TooManyRequests,
+    ),
+    initial=1.0,
+    maximum=10.0,
+    multiplier=2.0,
+    deadline=120.0,
 )
 
+# Corpus readiness polling (used after create_corpus)
+CORPUS_READY_INITIAL_DELAY = 0.1
+CORPUS_READY_MAX_DELAY = 2.0
+CORPUS_READY_TIMEOUT = 30.0
+CORPUS_OPERATION_TIMEOUT = 60.0
+
 # ============================================================
 # VERTEX AI INITIALIZATION
 # ============================================================
-logger.info("Initializing Vertex AI SDK")
-logger.info(f"Calling vertexai.init(project={PROJECT_ID}, location={LOCATION})")
-
 vertexai.init(project=PROJECT_ID, location=LOCATION)
 
-logger.info("Vertex AI SDK initialization completed successfully")
+# Shared chunking settings for every import_files() call
+TRANSFORMATION_CONFIG = rag.TransformationConfig(
+    rag.ChunkingConfig(
+        chunk_size=512,
+        chunk_overlap=64
+    )
+)
+
+
+# ============================================================
+# STARTUP LOGGING
+# ============================================================
+def _log_startup():
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    logger.info(BANNER_SEPARATOR)
+    logger.info("Vertex AI RAG Pipeline - Process Started")
+    logger.info(BANNER_SEPARATOR)
+
+    logger.info("PROJECT_ID set to: %s", PROJECT_ID)
+    logger.info("LOCATION set to: %s", LOCATION)
+    logger.info("CORPUS_DISPLAY_NAME set to: %s", CORPUS_DISPLAY_NAME)
+
+    logger.info("GCS_PATHS initialized with %d paths", len(GCS_PATHS))
+    for path in GCS_PATHS:
+        logger.debug("  └── GCS_PATH: %s", path)
+
+    logger.info(
+        "Retry policy configured | "
+        "initial=1.0s, maximum=10.0s, multiplier=2.0, deadline=120.0s"
+    )
+    logger.info("Vertex AI SDK initialized (project=%s, location=%s)", PROJECT_ID, LOCATION)
 
 # ============================================================
 # RAG CORPUS CREATION
 # ============================================================
 def create_rag_corpus(display_name: str):
-    logger.info("------------------------------------------------------------")
+    logger.info(SECTION_SEPARATOR)
     logger.info("Entering create_rag_corpus()")
-    logger.info(f"Requested corpus display name: {display_name}")
+    logger.info("Requested corpus display name: %s", display_name)
 
-    logger.info("Configuring embedding model for RAG corpus")
     embedding_config = rag.RagEmbeddingModelConfig(
         vertex_prediction_endpoint=rag.VertexPredictionEndpoint(
             publisher_model="publishers/google/models/text-embedding-005"
@@ -86,64 +130,77 @@ def create_rag_corpus(display_name: str):
     )
     logger.info("Embedding model set to: text-embedding-005")
 
-    logger.info("Configuring vector database backend")
     backend_config = rag.RagVectorDbConfig(
         rag_embedding_model_config=embedding_config
     )
 
     logger.info("Sending request to Vertex AI to create RAG corpus")
 
-    corpus = RAG_RETRY(rag.create_corpus)(
+    corpus = RAG_CREATE_RETRY(rag.create_corpus)(
         display_name=display_name,
         backend_config=backend_config,
     )
 
-    logger.info("RAG corpus creation request completed")
-    logger.info(f"RAG Corpus Resource Name: {corpus.name}")
-
+    logger.info("RAG Corpus Resource Name: %s", corpus.name)
     logger.info("Exiting create_rag_corpus()")
-    logger.info("------------------------------------------------------------")
+    logger.info(SECTION_SEPARATOR)
 
     return corpus
 
+# ============================================================
+# WAIT FOR CORPUS READINESS
+# ============================================================
+def wait_for_corpus_ready(corpus):
+    """
+    Blocks until a newly created corpus can accept imports.
+    Returns the ready corpus.
+    """
+    # Long-running operation: wait for its actual result
+    if hasattr(corpus, "result") and callable(corpus.result):
+        return corpus.result(timeout=CORPUS_OPERATION_TIMEOUT)
+
+    delay = CORPUS_READY_INITIAL_DELAY
+    deadline = time.monotonic() + CORPUS_READY_TIMEOUT
+
+    while True:
+        try:
+            return rag.get_corpus(name=corpus.name)
+        # Only "not ready yet" errors are polled; anything else is permanent
+        except (exceptions.NotFound, exceptions.FailedPrecondition) as error:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error("Corpus %s not ready after %.1fs", corpus.name, CORPUS_READY_TIMEOUT)
+                raise
+            sleep_for = min(delay, remaining)
+            logger.info("Corpus not ready yet (%s), retrying in %.1fs", error, sleep_for)
+            time.sleep(sleep_for)
+            delay = min(delay * 2, CORPUS_READY_MAX_DELAY)
+
 # ============================================================
 # RAG FILE IMPORT
 # ============================================================
 def import_to_rag_corpus(corpus_name: str, paths: List[str]):
-    logger.info("------------------------------------------------------------")
+    logger.info(SECTION_SEPARATOR)
     logger.info("Entering import_to_rag_corpus()")
-    logger.info(f"Target corpus: {corpus_name}")
-    logger.info(f"Number of files to import: {len(paths)}")
-
-    logger.info("Configuring chunking and transformation settings")
-    transformation_config = rag.TransformationConfig(
-        rag.ChunkingConfig(
-            chunk_size=512,
-            chunk_overlap=64
-        )
-    )
-
-    logger.info("Chunking configuration:")
-    logger.info("  ├── chunk_size: 512")
-    logger.info("  └── chunk_overlap: 64")
+    logger.info("Target corpus: %s", corpus_name)
+    logger.info("Number of files to import: %d", len(paths))
+    logger.info("Chunking configuration: chunk_size=512, chunk_overlap=64")
 
     logger.info("Submitting import_files() request to Vertex AI")
-
     response = RAG_RETRY(rag.import_files)(
         corpus_name,
         paths,
-        transformation_config=transformation_config,
+        transformation_config=TRANSFORMATION_CONFIG,
     )
 
-    logger.info("Import operation completed successfully")
     logger.info(
-        f"Import summary | "
-        f"Imported: {response.imported_rag_files_count}, "
-        f"Skipped: {response.skipped_rag_files_count}"
+        "Import summary | Imported: %s, Skipped: %s",
+        response.imported_rag_files_count,
+        response.skipped_rag_files_count,
     )
 
     logger.info("Exiting import_to_rag_corpus()")
-    logger.info("------------------------------------------------------------")
+    logger.info(SECTION_SEPARATOR)
 
     return response
 
@@ -151,31 +208,33 @@ def import_to_rag_corpus(corpus_name: str, paths: List[str]):
 # MAIN PIPELINE EXECUTION
 # ============================================================
 def run_pipeline():
-    logger.info("============================================================")
+    _log_startup()
+
+    logger.info(BANNER_SEPARATOR)
     logger.info("RAG Pipeline Execution Started")
-    logger.info("============================================================")
+    logger.info(BANNER_SEPARATOR)
 
     try:
         logger.info("Step 1: Creating RAG corpus")
         corpus = create_rag_corpus(CORPUS_DISPLAY_NAME)
 
+        logger.info("Waiting for RAG corpus to become ready")
+        corpus = wait_for_corpus_ready(corpus)
         logger.info("Step 1 completed successfully")
-        logger.info("Sleeping for 4 seconds to allow backend stabilization")
-        time.sleep(4)
 
         logger.info("Step 2: Importing documents from Google Cloud Storage")
         import_to_rag_corpus(corpus.name, GCS_PATHS)
 
         logger.info("Step 2 completed successfully")
 
-        logger.info("============================================================")
+        logger.info(BANNER_SEPARATOR)
         logger.info("RAG Pipeline Execution Finished Successfully")
-        logger.info("============================================================")
+        logger.info(BANNER_SEPARATOR)
 
     except Exception as error:
-        logger.error("============================================================")
+        logger.error(BANNER_SEPARATOR)
         logger.error("RAG Pipeline Execution FAILED")
-        logger.error("============================================================")
+        logger.error(BANNER_SEPARATOR)
         logger.exception(error)
         raise
 
@@ -184,4 +243,4 @@ def run_pipeline():
 # ============================================================
 if __name__ == "__main__":
     logger.info("Script invoked directly (__main__)")
-    run_pipeline()
\ No newline at end of file
+    run_pipeline()